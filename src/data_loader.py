@@ -1,100 +1,113 @@
 from __future__ import annotations
 
-from collections import defaultdict
-from typing import Dict, List, Optional, Set
+from typing import Dict, List, Optional
 
-import pandas as pd
+import numpy as np
+import openpyxl
 
-from .models import LabSession, Student, TimeSlot
+from .models import LabSession, Student
 from .utils import make_timeslot, parse_period_range, parse_weekday, parse_weeks
 
 
 def _clean_str(value: Optional[str]) -> str:
     if value is None:
         return ""
-    if isinstance(value, float) and pd.isna(value):
+    if isinstance(value, float) and value != value:
         return ""
     return str(value).strip()
 
 
+def _as_int(value, default: int = 0) -> int:
+    # None 或 NaN（自身不等于自身）都按默认值处理
+    if value is None or value != value:
+        return default
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return default
+
+
+def _read_excel_columns(path: str, names: List[str]) -> List[list]:
+    # openpyxl 只读模式逐行取纯值，跳过样式与公式解析；
+    # 只抽取所需列，返回与 names 对齐的列 list
+    wb = openpyxl.load_workbook(path, read_only=True, data_only=True)
+    try:
+        ws = wb.active
+        rows = ws.iter_rows(values_only=True)
+        headers = next(rows, ())
+        index = {h: i for i, h in enumerate(headers)}
+        positions = [index.get(name) for name in names]
+        cols: List[list] = [[] for _ in names]
+        for row in rows:
+            width = len(row)
+            for col, pos in zip(cols, positions):
+                col.append(row[pos] if pos is not None and pos < width else None)
+        return cols
+    finally:
+        wb.close()
+
+
 def load_lab_sessions(path: str) -> List[LabSession]:
-    df = pd.read_excel(path)
+    weeks_col, weekday_col, start_col, end_col, teacher_col, cap_col, hours_col, group_col, project_col = _read_excel_columns(
+        path,
+        ["上课周次", "上课星期", "开始节次", "结束节次", "上课教师", "实验人数", "课时", "实验组名称", "实验项目名称"],
+    )
     sessions: List[LabSession] = []
-    for idx, row in df.iterrows():
-        weeks = parse_weeks(row.get("上课周次"))
-        weekday = parse_weekday(row.get("上课星期"))
-        start_period, _ = parse_period_range(row.get("开始节次"))
-        end_period, _ = parse_period_range(row.get("结束节次"))
-        teacher = _clean_str(row.get("上课教师"))
-        capacity = int(row.get("实验人数", 0)) if not pd.isna(row.get("实验人数")) else 0
-        hours = int(row.get("课时", 0)) if not pd.isna(row.get("课时")) else 0
+    for idx, (weeks_raw, weekday_raw, start_raw, end_raw, teacher_raw, cap_raw, hours_raw, group_raw, project_raw) in enumerate(
+        zip(weeks_col, weekday_col, start_col, end_col, teacher_col, cap_col, hours_col, group_col, project_col)
+    ):
+        start_period, _ = parse_period_range(start_raw)
+        end_period, _ = parse_period_range(end_raw)
         session = LabSession(
             session_id=idx,
-            group_name=_clean_str(row.get("实验组名称")),
-            project_name=_clean_str(row.get("实验项目名称")),
-            weeks=weeks,
-            weekday=weekday or 0,
+            group_name=_clean_str(group_raw),
+            project_name=_clean_str(project_raw),
+            weeks_mask=parse_weeks(weeks_raw),
+            weekday=parse_weekday(weekday_raw) or 0,
             start_period=start_period or 0,
             end_period=end_period or 0,
-            teacher=teacher,
-            capacity=capacity,
-            hours=hours,
+            teacher=_clean_str(teacher_raw),
+            capacity=_as_int(cap_raw),
+            hours=_as_int(hours_raw),
         )
         sessions.append(session)
     return sessions
 
 
-def _busy_from_lecture_schedule(df: pd.DataFrame) -> Dict[str, List[TimeSlot]]:
-    busy: Dict[str, List[TimeSlot]] = defaultdict(list)
-    for _, row in df.iterrows():
-        sid = _clean_str(row.get("学号"))
-        if not sid:
-            continue
-        weeks = parse_weeks(row.get("周次"))
-        weekday = parse_weekday(row.get("上课星期"))
-        start, end = parse_period_range(row.get("上课节次"))
-        slot = make_timeslot(weeks, weekday or 0, start or 0, end or 0)
-        if slot:
-            busy[sid].append(slot)
-    return busy
-
-
-def _collect_meta_from_lecture(df: pd.DataFrame) -> Dict[str, Dict[str, str]]:
-    meta: Dict[str, Dict[str, str]] = {}
-    for _, row in df.iterrows():
-        sid = _clean_str(row.get("学号"))
-        if not sid:
-            continue
-        meta[sid] = {
-            "name": _clean_str(row.get("姓名（可能有重名）")),
-            "dept": _clean_str(row.get("院系名称")),
-            "major": _clean_str(row.get("专业名称")),
-            "clazz": _clean_str(row.get("班级名称")),
-        }
-    return meta
-
-
 def load_students(
     required_hours: int,
     lecture_schedule_path: str,
 ) -> Dict[str, Student]:
-    lecture_df = pd.read_excel(lecture_schedule_path)
-
-    busy = _busy_from_lecture_schedule(lecture_df)
-    meta = _collect_meta_from_lecture(lecture_df)
-
+    # 单次遍历同时收集学生元信息与已占用时间片，避免对大表扫描两遍
+    sid_col, name_col, dept_col, major_col, clazz_col, weeks_col, weekday_col, period_col = _read_excel_columns(
+        lecture_schedule_path,
+        ["学号", "姓名（可能有重名）", "院系名称", "专业名称", "班级名称", "周次", "上课星期", "上课节次"],
+    )
     students: Dict[str, Student] = {}
-    all_ids: Set[str] = set(busy.keys()) | set(meta.keys())
-    for sid in all_ids:
-        info = meta.get(sid, {})
-        student = Student(
-            student_id=sid,
-            name=info.get("name", ""),
-            dept=info.get("dept", ""),
-            major=info.get("major", ""),
-            clazz=info.get("clazz", ""),
-            required_hours=required_hours,
-            busy_slots=busy.get(sid, []),
-        )
-        students[sid] = student
+    for sid_raw, name_raw, dept_raw, major_raw, clazz_raw, weeks_raw, weekday_raw, period_raw in zip(
+        sid_col, name_col, dept_col, major_col, clazz_col, weeks_col, weekday_col, period_col
+    ):
+        sid = _clean_str(sid_raw)
+        if not sid:
+            continue
+        student = students.get(sid)
+        if student is None:
+            student = Student(
+                student_id=sid,
+                name=_clean_str(name_raw),
+                dept=_clean_str(dept_raw),
+                major=_clean_str(major_raw),
+                clazz=_clean_str(clazz_raw),
+                required_hours=required_hours,
+                busy_slots=[],
+            )
+            students[sid] = student
+        weeks = parse_weeks(weeks_raw)
+        weekday = parse_weekday(weekday_raw)
+        start, end = parse_period_range(period_raw)
+        slot = make_timeslot(weeks, weekday or 0, start or 0, end or 0)
+        if slot:
+            student.busy_slots.append(slot)
+    for student in students.values():
+        student.busy_packed = np.asarray(student.busy_slots, dtype=np.int64)
     return students
@@ -0,0 +1,33 @@
+from __future__ import annotations
+
+from .models import ES_SHIFT, SS_SHIFT, WD_SHIFT, WEEK_MASK
+
+try:
+    from numba import njit
+
+    HAS_NUMBA = True
+except ImportError:  # numba 是可选加速依赖，缺失时走纯 Python 路径
+    njit = None
+    HAS_NUMBA = False
+
+
+def _any_conflict(busy, cand):
+    # busy: 打包时间片的 np.int64 数组；cand: 单个打包时间片
+    for i in range(busy.shape[0]):
+        b = busy[i]
+        if (b >> WD_SHIFT) != (cand >> WD_SHIFT):
+            continue
+        if not (b & cand & WEEK_MASK):
+            continue
+        if ((b >> ES_SHIFT) & 31) < ((cand >> SS_SHIFT) & 31):
+            continue
+        if ((cand >> ES_SHIFT) & 31) < ((b >> SS_SHIFT) & 31):
+            continue
+        return True
+    return False
+
+
+if HAS_NUMBA:
+    any_conflict = njit(cache=True)(_any_conflict)
+else:
+    any_conflict = _any_conflict
@@ -1,35 +1,60 @@
 from __future__ import annotations
 
+from collections import Counter
 from dataclasses import dataclass, field
-from typing import List, Set, Dict, Optional
+from typing import List, Optional
 
+import numpy as np
+
+
+def _dec(counter: Counter, key) -> None:
+    # Counter 减到 0 时删除键，保证 len(counter) 始终是“不同取值个数”
+    counter[key] -= 1
+    if counter[key] <= 0:
+        del counter[key]
+
+
+# 时间片打包为单个 int：低 40 位是周次掩码，其上依次为开始节次(5位)、
+# 结束节次(5位)、星期(3位)。冲突检测从对象属性访问变为纯整数运算。
+WEEK_MASK = (1 << 40) - 1
+SS_SHIFT = 40
+ES_SHIFT = 45
+WD_SHIFT = 50
+
+
+def ts_pack(weeks_mask: int, weekday: int, start_period: int, end_period: int) -> int:
+    return (
+        (weekday << WD_SHIFT)
+        | (end_period << ES_SHIFT)
+        | (start_period << SS_SHIFT)
+        | (weeks_mask & WEEK_MASK)
+    )
+
+
+def ts_slot_key(ts: int) -> int:
+    # 去掉周次后剩下的 (星期, 节次区间)，用于“同一时段”判断
+    return ts >> SS_SHIFT
 
-@dataclass
-class TimeSlot:
-    """表示一段具体的上课时间，用于冲突检测。"""
-    weeks: Set[int]
-    weekday: int
-    start_period: int
-    end_period: int
 
-    def conflicts_with(self, other: "TimeSlot") -> bool:
-        # 周次有交集且星期相同，并且节次区间有重叠即视为冲突
-        if not (self.weeks and other.weeks):
-            return False
-        if self.weekday != other.weekday:
-            return False
-        if not (self.weeks & other.weeks):
-            return False
-        return not (self.end_period < other.start_period or other.end_period < self.start_period)
+def ts_conflict(a: int, b: int) -> bool:
+    # 周次有交集且星期相同，并且节次区间有重叠即视为冲突
+    if (a >> WD_SHIFT) != (b >> WD_SHIFT):
+        return False
+    if not (a & b & WEEK_MASK):
+        return False
+    return not (
+        ((a >> ES_SHIFT) & 31) < ((b >> SS_SHIFT) & 31)
+        or ((b >> ES_SHIFT) & 31) < ((a >> SS_SHIFT) & 31)
+    )
 
 
-@dataclass
+@dataclass(slots=True)
 class LabSession:
     """实验排课表中的一个具体实验组。"""
     session_id: int
     group_name: str
     project_name: str
-    weeks: Set[int]
+    weeks_mask: int
     weekday: int
     start_period: int
     end_period: int
@@ -37,6 +62,45 @@ class LabSession:
     capacity: int
     hours: int
     assigned_students: List[str] = field(default_factory=list)
+    ts_packed: int = field(init=False, repr=False)
+    # 由 Scheduler 统一编号，把项目名比较降为整数比较
+    project_id: int = field(default=0, init=False, repr=False)
+    # 组内班级/专业分布的增量计数，评分时免去逐人扫描
+    class_counts: Counter = field(default_factory=Counter, init=False, repr=False)
+    major_counts: Counter = field(default_factory=Counter, init=False, repr=False)
+    pair_counts: Counter = field(default_factory=Counter, init=False, repr=False)
+    # student_id -> 在 assigned_students 中的下标，支持 O(1) 删除
+    _assigned_idx: dict = field(default_factory=dict, init=False, repr=False)
+
+    def __post_init__(self) -> None:
+        self.ts_packed = ts_pack(self.weeks_mask, self.weekday, self.start_period, self.end_period)
+
+    def has_student(self, student_id: str) -> bool:
+        return student_id in self._assigned_idx
+
+    def add_student(self, student: "Student") -> None:
+        self._assigned_idx[student.student_id] = len(self.assigned_students)
+        self.assigned_students.append(student.student_id)
+        if student.clazz:
+            self.class_counts[student.clazz] += 1
+        if student.major:
+            self.major_counts[student.major] += 1
+        if student.clazz and student.major:
+            self.pair_counts[(student.clazz, student.major)] += 1
+
+    def remove_student(self, student: "Student") -> None:
+        # 与末位互换后弹出，避免 list.remove 的线性扫描
+        idx = self._assigned_idx.pop(student.student_id)
+        last = self.assigned_students.pop()
+        if last != student.student_id:
+            self.assigned_students[idx] = last
+            self._assigned_idx[last] = idx
+        if student.clazz:
+            _dec(self.class_counts, student.clazz)
+        if student.major:
+            _dec(self.major_counts, student.major)
+        if student.clazz and student.major:
+            _dec(self.pair_counts, (student.clazz, student.major))
 
     @property
     def remaining(self) -> int:
@@ -44,14 +108,12 @@ class LabSession:
 
     @property
     def main_week(self) -> int:
-        # 用于排序与离散度计算，取最小周次代表本次实验位置
-        return min(self.weeks) if self.weeks else 0
+        # 用于排序与离散度计算，取最小周次（最低有效位）代表本次实验位置
+        mask = self.weeks_mask
+        return (mask & -mask).bit_length() - 1 if mask else 0
 
-    def to_timeslot(self) -> TimeSlot:
-        return TimeSlot(self.weeks, self.weekday, self.start_period, self.end_period)
 
-
-@dataclass
+@dataclass(slots=True)
 class Student:
     """学生实体，保存基本信息与课表。"""
     student_id: str
@@ -60,19 +122,39 @@ class Student:
     major: Optional[str]
     clazz: Optional[str]
     required_hours: int
-    busy_slots: List[TimeSlot]
+    busy_slots: List[int]
+    # busy_slots 的 np.int64 镜像，供 numba 内核扫描；加载完成后由 data_loader 填充
+    busy_packed: Optional[np.ndarray] = field(default=None, repr=False)
     assigned: List[int] = field(default_factory=list)
-    taken_projects: Set[str] = field(default_factory=set)
+    # 理论课 + 已分配实验的全部打包时间片，候选过滤只扫这一个列表
+    all_busy: List[int] = field(default_factory=list)
+    # 已修项目的位掩码，第 project_id 位为 1 表示已做过该项目
+    taken_mask: int = 0
+    # 已分配实验的累计学时，随分配/交换增量维护
+    hours_total: int = 0
+    # session_id -> 在 assigned 中的下标，支持 O(1) 删除
+    _assigned_idx: dict = field(default_factory=dict, init=False, repr=False)
+
+    def has_assigned(self, session_id: int) -> bool:
+        return session_id in self._assigned_idx
+
+    def add_assigned(self, session_id: int) -> None:
+        self._assigned_idx[session_id] = len(self.assigned)
+        self.assigned.append(session_id)
 
-    def add_busy_slot(self, slot: TimeSlot) -> None:
+    def remove_assigned(self, session_id: int) -> None:
+        idx = self._assigned_idx.pop(session_id)
+        last = self.assigned.pop()
+        if last != session_id:
+            self.assigned[idx] = last
+            self._assigned_idx[last] = idx
+
+    def add_busy_slot(self, slot: int) -> None:
         self.busy_slots.append(slot)
 
-    def has_conflict(self, slot: TimeSlot, session_lookup: Dict[int, LabSession]) -> bool:
-        # 与已有课程或已分配实验的时间冲突则返回 True
+    def has_conflict(self, ts: int) -> bool:
+        # 与已有理论课时间冲突则返回 True；实验之间的冲突由调度器的冲突表判定
         for busy in self.busy_slots:
-            if busy.conflicts_with(slot):
-                return True
-        for sid in self.assigned:
-            if session_lookup[sid].to_timeslot().conflicts_with(slot):
+            if ts_conflict(busy, ts):
                 return True
         return False
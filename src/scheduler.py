@@ -7,7 +7,11 @@ from typing import Dict, List, Optional, Tuple
 
 import pandas as pd
 
-from .models import LabSession, Student
+import numpy as np
+
+from .kernels import HAS_NUMBA, any_conflict
+from .models import ES_SHIFT, SS_SHIFT, WD_SHIFT, WEEK_MASK, LabSession, Student, ts_conflict, ts_slot_key
+from .utils import weeks_from_mask
 
 WEEKDAY_LABEL = {
     1: "星期一",
@@ -35,6 +39,7 @@ class Scheduler:
         w_spread: float = 0.2,
         w_slot: float = 0.1,
         swap_iterations: int = 200,
+        swap_temperature: float = 0.2,
     ) -> None:
         self.students = students
         self.sessions = sessions
@@ -46,80 +51,120 @@ class Scheduler:
         self.w_spread = w_spread
         self.w_slot = w_slot
         self.swap_iterations = swap_iterations
+        self.swap_temperature = swap_temperature
+        # 项目名转为小整数编号，学生侧用位掩码记录已修项目
+        self.project_id: Dict[str, int] = {
+            name: i for i, name in enumerate(sorted({s.project_name for s in sessions}))
+        }
+        for session in sessions:
+            session.project_id = self.project_id[session.project_name]
+        self._conflicts_by_sid = self._build_conflict_sets(sessions)
+        # 各实验组属性的列式镜像，候选过滤用 numpy 批量完成
+        self._sess_index: Dict[int, int] = {s.session_id: i for i, s in enumerate(sessions)}
+        self._sess_wd = np.array([s.weekday for s in sessions], dtype=np.int64)
+        self._sess_start = np.array([s.start_period for s in sessions], dtype=np.int64)
+        self._sess_end = np.array([s.end_period for s in sessions], dtype=np.int64)
+        self._sess_weeks = np.array([s.weeks_mask for s in sessions], dtype=np.int64)
+        self._sess_remaining = np.array([s.remaining for s in sessions], dtype=np.int64)
+        # 再按星期分桶：冲突判定只需触碰同星期的子数组（约 1/7 的数据量）
+        self._wd_buckets: Dict[int, Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]] = {}
+        for wd in np.unique(self._sess_wd):
+            idx = np.flatnonzero(self._sess_wd == wd)
+            self._wd_buckets[int(wd)] = (
+                idx,
+                self._sess_weeks[idx],
+                self._sess_start[idx],
+                self._sess_end[idx],
+            )
+        for stu in students.values():
+            stu.all_busy = stu.busy_slots + [self.session_lookup[sid].ts_packed for sid in stu.assigned]
         random.seed(seed)
 
-    def _student_hours(self, student: Student) -> int:
-        return sum(self.session_lookup[sid].hours for sid in student.assigned)
+    @staticmethod
+    def _build_conflict_sets(sessions: List[LabSession]) -> Dict[int, frozenset]:
+        # 一次性计算实验组之间的两两时间冲突，排课时只需查表，
+        # 不必对学生的每个已分配实验重复做冲突判断
+        by_weekday: Dict[int, List[LabSession]] = defaultdict(list)
+        for session in sessions:
+            by_weekday[session.weekday].append(session)
+        conflicts: Dict[int, set] = {s.session_id: set() for s in sessions}
+        for bucket in by_weekday.values():
+            for i, a in enumerate(bucket):
+                for b in bucket[i + 1:]:
+                    if ts_conflict(a.ts_packed, b.ts_packed):
+                        conflicts[a.session_id].add(b.session_id)
+                        conflicts[b.session_id].add(a.session_id)
+        return {sid: frozenset(ids) for sid, ids in conflicts.items()}
+
+    @staticmethod
+    def _busy_conflict(student: Student, ts: int) -> bool:
+        # 有 numba 时在打包数组上跑编译内核，否则保持纯 Python 扫描
+        if HAS_NUMBA and student.busy_packed is not None:
+            return bool(any_conflict(student.busy_packed, ts))
+        return student.has_conflict(ts)
 
     def _target_hours(self, student: Student) -> int:
         return student.required_hours or self.required_hours
 
-    def _same_slot_count(self, student: Student, session: LabSession) -> int:
-        # 同一学生已分配的课程中，与当前时段相同的数量，用于 B9 偏好
-        count = 0
-        new_slot = session.to_timeslot()
+    def _student_profile(self, student: Student) -> Tuple[List[int], Dict[int, int]]:
+        # 评分里只依赖学生已分配课程的部分，在候选循环外算一次
+        assigned_weeks: List[int] = []
+        slot_counts: Dict[int, int] = {}
         for sid in student.assigned:
-            other_slot = self.session_lookup[sid].to_timeslot()
-            if (
-                other_slot.weekday == new_slot.weekday
-                and other_slot.start_period == new_slot.start_period
-                and other_slot.end_period == new_slot.end_period
-            ):
-                count += 1
-        return count
-
-    def _spread_distance(self, student: Student, session: LabSession) -> int:
+            session = self.session_lookup[sid]
+            assigned_weeks.append(session.main_week)
+            key = ts_slot_key(session.ts_packed)
+            slot_counts[key] = slot_counts.get(key, 0) + 1
+        return assigned_weeks, slot_counts
+
+    def _spread_distance(self, session: LabSession, assigned_weeks: List[int]) -> int:
         # 计算与学生已分配课程在周次上的最小距离，用于 B7 均匀分布
-        if not student.assigned:
+        if not assigned_weeks:
             return 0
         target_week = session.main_week
-        distances = [abs(target_week - self.session_lookup[sid].main_week) for sid in student.assigned]
-        return min(distances) if distances else 0
+        return min(abs(target_week - w) for w in assigned_weeks)
 
     def _class_match_ratio(self, student: Student, session: LabSession) -> float:
-        # 同班/同专业已在该组的占比，鼓励聚类
-        if not session.assigned_students:
+        # 同班/同专业已在该组的占比，鼓励聚类。
+        # 班级命中数 + 专业命中数 - 两者皆命中数 = 命中并集大小
+        size = len(session.assigned_students)
+        if not size:
             return 0.0
         same = 0
-        for sid in session.assigned_students:
-            peer = self.students.get(sid)
-            if not peer:
-                continue
-            if peer.clazz and student.clazz and peer.clazz == student.clazz:
-                same += 1
-            elif peer.major and student.major and peer.major == student.major:
-                same += 1
-        return same / (len(session.assigned_students) + 1)
+        if student.clazz:
+            same += session.class_counts.get(student.clazz, 0)
+        if student.major:
+            same += session.major_counts.get(student.major, 0)
+        if student.clazz and student.major:
+            same -= session.pair_counts.get((student.clazz, student.major), 0)
+        return same / (size + 1)
 
     def _hetero_level(self, session: LabSession, incoming: Optional[Student] = None) -> float:
         # 组内班级/专业的异质度（比例越高越“杂”）
-        classes = set()
-        majors = set()
-        for sid in session.assigned_students:
-            peer = self.students.get(sid)
-            if not peer:
-                continue
-            if peer.clazz:
-                classes.add(peer.clazz)
-            if peer.major:
-                majors.add(peer.major)
-        if incoming:
-            if incoming.clazz:
-                classes.add(incoming.clazz)
-            if incoming.major:
-                majors.add(incoming.major)
         size = len(session.assigned_students) + (1 if incoming else 0)
         if size == 0:
             return 0.0
-        distinct = max(len(classes), len(majors))
-        return distinct / size
+        classes = len(session.class_counts)
+        majors = len(session.major_counts)
+        if incoming:
+            if incoming.clazz and incoming.clazz not in session.class_counts:
+                classes += 1
+            if incoming.major and incoming.major not in session.major_counts:
+                majors += 1
+        return max(classes, majors) / size
 
-    def _score(self, student: Student, session: LabSession) -> Tuple[float, float, float, float]:
+    def _score(
+        self,
+        student: Student,
+        session: LabSession,
+        assigned_weeks: List[int],
+        slot_counts: Dict[int, int],
+    ) -> Tuple[float, float, float, float]:
         occupancy_ratio = (session.capacity - session.remaining) / session.capacity if session.capacity else 1.0
-        spread_bonus = -self._spread_distance(student, session)  # 越分散分数越低（更优）
+        spread_bonus = -self._spread_distance(session, assigned_weeks)  # 越分散分数越低（更优）
         class_bonus = -self.w_class * self._class_match_ratio(student, session)
         hetero_penalty = self.w_hetero * self._hetero_level(session, student)
-        slot_bonus = -self.w_slot * self._same_slot_count(student, session)
+        slot_bonus = -self.w_slot * slot_counts.get(ts_slot_key(session.ts_packed), 0)
         return (
             occupancy_ratio * self.w_occupancy,
             class_bonus + hetero_penalty,
@@ -128,14 +173,24 @@ class Scheduler:
         )
 
     def _candidate_sessions(self, student: Student) -> List[LabSession]:
-        candidates: List[LabSession] = []
-        for session in self.sessions:
-            if session.remaining <= 0:
-                continue
-            if session.project_name in student.taken_projects:
+        # 先用一轮列式位运算排除满员的组以及与该学生任何已占用时间
+        # （理论课或已分配实验）冲突的组，剩余少量候选再做项目去重
+        ok = self._sess_remaining > 0
+        for busy in student.all_busy:
+            bucket = self._wd_buckets.get(busy >> WD_SHIFT)
+            if bucket is None:
                 continue
-            slot = session.to_timeslot()
-            if student.has_conflict(slot, self.session_lookup):
+            idx, weeks_arr, start_arr, end_arr = bucket
+            weeks = busy & WEEK_MASK
+            start = (busy >> SS_SHIFT) & 31
+            end = (busy >> ES_SHIFT) & 31
+            hit = ((weeks_arr & weeks) != 0) & (start_arr <= end) & (end_arr >= start)
+            ok[idx[hit]] = False
+        candidates: List[LabSession] = []
+        taken_mask = student.taken_mask
+        for i in np.flatnonzero(ok):
+            session = self.sessions[i]
+            if taken_mask >> session.project_id & 1:
                 continue
             candidates.append(session)
         return candidates
@@ -143,59 +198,78 @@ class Scheduler:
     def assign(self) -> List[Tuple[str, int]]:
         # 返回 (student_id, session_id)
         assignments: List[Tuple[str, int]] = []
-        # 先按班级/专业分组，组内顺序随机打散，提升 B8
-        class_groups: Dict[str, List[str]] = defaultdict(list)
-        for sid, stu in self.students.items():
-            key = stu.clazz or stu.major or "_misc"
-            class_groups[key].append(sid)
-        ordered_students: List[str] = []
-        for _, sids in sorted(class_groups.items(), key=lambda item: -len(item[1])):
-            random.shuffle(sids)
-            ordered_students.extend(sids)
+        # 经典 CSP 启发式：最受约束的学生先排（可选实验组越少越先），
+        # 约束度相同的学生随机打散；同班聚合交给评分项与交换阶段
+        candidate_counts = {
+            sid: len(self._candidate_sessions(stu)) for sid, stu in self.students.items()
+        }
+        ordered_students = list(self.students)
+        random.shuffle(ordered_students)
+        ordered_students.sort(key=candidate_counts.__getitem__)
 
         for sid in ordered_students:
+            if candidate_counts[sid] == 0:
+                # 一开始就无任何可选组的学生，后面只会更满，直接记为未满足
+                continue
             student = self.students[sid]
-            while self._student_hours(student) < self._target_hours(student):
+            while student.hours_total < self._target_hours(student):
                 candidates = self._candidate_sessions(student)
                 if not candidates:
                     break
-                candidates.sort(key=lambda s: self._score(student, s))
-                chosen = candidates[0]
-                chosen.assigned_students.append(student.student_id)
-                student.assigned.append(chosen.session_id)
-                student.taken_projects.add(chosen.project_name)
+                assigned_weeks, slot_counts = self._student_profile(student)
+                # 只需要最优候选，min 一次遍历即可，不必整表排序
+                chosen = min(candidates, key=lambda s: self._score(student, s, assigned_weeks, slot_counts))
+                chosen.add_student(student)
+                self._sess_remaining[self._sess_index[chosen.session_id]] -= 1
+                student.add_assigned(chosen.session_id)
+                student.all_busy.append(chosen.ts_packed)
+                student.taken_mask |= 1 << chosen.project_id
+                student.hours_total += chosen.hours
                 assignments.append((student.student_id, chosen.session_id))
                 # 若刚好满足或超出要求则停止
-                if self._student_hours(student) >= self._target_hours(student):
+                if student.hours_total >= self._target_hours(student):
                     break
         if self.swap_iterations > 0:
             self._local_optimize()
         return assignments
 
-    def _has_project(self, student: Student, project_name: str, exclude_session_id: Optional[int] = None) -> bool:
+    def _has_project(self, student: Student, project_id: int, exclude_session_id: Optional[int] = None) -> bool:
         for sid in student.assigned:
             if exclude_session_id is not None and sid == exclude_session_id:
                 continue
-            if self.session_lookup[sid].project_name == project_name:
+            if self.session_lookup[sid].project_id == project_id:
                 return True
         return False
 
+    def _taken_mask(self, student: Student) -> int:
+        mask = 0
+        for sid in student.assigned:
+            mask |= 1 << self.session_lookup[sid].project_id
+        return mask
+
     def _conflicts_with_other_assignments(
         self,
         student: Student,
         target_session: LabSession,
         exclude_session_id: Optional[int] = None,
     ) -> bool:
-        slot = target_session.to_timeslot()
+        conflicts = self._conflicts_by_sid[target_session.session_id]
         for sid in student.assigned:
             if exclude_session_id is not None and sid == exclude_session_id:
                 continue
-            if self.session_lookup[sid].to_timeslot().conflicts_with(slot):
+            if sid in conflicts:
                 return True
-        for busy in student.busy_slots:
-            if busy.conflicts_with(slot):
-                return True
-        return False
+        return self._busy_conflict(student, target_session.ts_packed)
+
+    @staticmethod
+    def _distinct_after(counts, out_value: Optional[str], in_value: Optional[str]) -> int:
+        # 在增量计数上模拟“移出一个、换入一个”后的不同取值个数
+        distinct = len(counts)
+        if out_value and out_value != in_value and counts.get(out_value, 0) == 1:
+            distinct -= 1
+        if in_value and in_value not in counts:
+            distinct += 1
+        return distinct
 
     def _session_diversity(
         self,
@@ -203,32 +277,21 @@ class Scheduler:
         swap_out: Optional[Student] = None,
         swap_in: Optional[Student] = None,
     ) -> float:
-        classes = set()
-        majors = set()
-        for sid in session.assigned_students:
-            if swap_out and sid == swap_out.student_id:
-                continue
-            peer = self.students.get(sid)
-            if not peer:
-                continue
-            if peer.clazz:
-                classes.add(peer.clazz)
-            if peer.major:
-                majors.add(peer.major)
-        if swap_in:
-            if swap_in.clazz:
-                classes.add(swap_in.clazz)
-            if swap_in.major:
-                majors.add(swap_in.major)
+        out_member = swap_out is not None and session.has_student(swap_out.student_id)
+        out_clazz = swap_out.clazz if out_member else None
+        out_major = swap_out.major if out_member else None
+        in_clazz = swap_in.clazz if swap_in else None
+        in_major = swap_in.major if swap_in else None
         size = len(session.assigned_students)
-        if swap_out and swap_out.student_id in session.assigned_students:
+        if out_member:
             size -= 1
         if swap_in:
             size += 1
         if size <= 0:
             return 0.0
-        distinct = max(len(classes), len(majors))
-        return distinct / size
+        classes = self._distinct_after(session.class_counts, out_clazz, in_clazz)
+        majors = self._distinct_after(session.major_counts, out_major, in_major)
+        return max(classes, majors) / size
 
     def _can_swap(
         self,
@@ -240,9 +303,9 @@ class Scheduler:
         if session_a.session_id == session_b.session_id:
             return False
         # 项目唯一性
-        if self._has_project(student_a, session_b.project_name, exclude_session_id=session_a.session_id):
+        if self._has_project(student_a, session_b.project_id, exclude_session_id=session_a.session_id):
             return False
-        if self._has_project(student_b, session_a.project_name, exclude_session_id=session_b.session_id):
+        if self._has_project(student_b, session_a.project_id, exclude_session_id=session_b.session_id):
             return False
         # 时间冲突
         if self._conflicts_with_other_assignments(student_a, session_b, exclude_session_id=session_a.session_id):
@@ -250,22 +313,14 @@ class Scheduler:
         if self._conflicts_with_other_assignments(student_b, session_a, exclude_session_id=session_b.session_id):
             return False
         # 学时不降档
-        new_hours_a = self._student_hours(student_a) - session_a.hours + session_b.hours
-        new_hours_b = self._student_hours(student_b) - session_b.hours + session_a.hours
+        new_hours_a = student_a.hours_total - session_a.hours + session_b.hours
+        new_hours_b = student_b.hours_total - session_b.hours + session_a.hours
         if new_hours_a < self._target_hours(student_a):
             return False
         if new_hours_b < self._target_hours(student_b):
             return False
         return True
 
-    def _drop_project_if_unused(self, student: Student, project_name: str, removed_session_id: int) -> None:
-        for sid in student.assigned:
-            if sid == removed_session_id:
-                continue
-            if self.session_lookup[sid].project_name == project_name:
-                return
-        student.taken_projects.discard(project_name)
-
     def _perform_swap(
         self,
         student_a: Student,
@@ -273,36 +328,44 @@ class Scheduler:
         student_b: Student,
         session_b: LabSession,
     ) -> None:
-        # 更新 session 成员
-        if student_a.student_id in session_a.assigned_students:
-            session_a.assigned_students.remove(student_a.student_id)
-        if student_b.student_id in session_b.assigned_students:
-            session_b.assigned_students.remove(student_b.student_id)
-        session_a.assigned_students.append(student_b.student_id)
-        session_b.assigned_students.append(student_a.student_id)
+        # 更新 session 成员及增量计数
+        if session_a.has_student(student_a.student_id):
+            session_a.remove_student(student_a)
+        if session_b.has_student(student_b.student_id):
+            session_b.remove_student(student_b)
+        session_a.add_student(student_b)
+        session_b.add_student(student_a)
 
         # 更新学生的 session 列表
-        if session_a.session_id in student_a.assigned:
-            student_a.assigned.remove(session_a.session_id)
-        student_a.assigned.append(session_b.session_id)
+        if student_a.has_assigned(session_a.session_id):
+            student_a.remove_assigned(session_a.session_id)
+        student_a.add_assigned(session_b.session_id)
 
-        if session_b.session_id in student_b.assigned:
-            student_b.assigned.remove(session_b.session_id)
-        student_b.assigned.append(session_a.session_id)
+        if student_b.has_assigned(session_b.session_id):
+            student_b.remove_assigned(session_b.session_id)
+        student_b.add_assigned(session_a.session_id)
 
-        # 更新项目集合
-        self._drop_project_if_unused(student_a, session_a.project_name, removed_session_id=session_a.session_id)
-        self._drop_project_if_unused(student_b, session_b.project_name, removed_session_id=session_b.session_id)
-        student_a.taken_projects.add(session_b.project_name)
-        student_b.taken_projects.add(session_a.project_name)
+        # 同步学时与项目掩码（assigned 数量很小，OR 归约比扫描后 discard 更快）
+        student_a.hours_total += session_b.hours - session_a.hours
+        student_b.hours_total += session_a.hours - session_b.hours
+        student_a.taken_mask = self._taken_mask(student_a)
+        student_b.taken_mask = self._taken_mask(student_b)
+        # 交换不频繁，直接重建合并时间片列表
+        for stu in (student_a, student_b):
+            stu.all_busy = stu.busy_slots + [self.session_lookup[sid].ts_packed for sid in stu.assigned]
 
     def _local_optimize(self) -> None:
-        # 简单的局部交换，降低组内班级/专业异质度
+        # 局部交换降低组内班级/专业异质度；阈值接受（温度线性退火）
+        # 允许前期接受轻微变差的交换，跳出严格改进容易陷入的局部最优
         student_ids = [sid for sid, stu in self.students.items() if stu.assigned]
         if len(student_ids) < 2:
             return
-        for _ in range(self.swap_iterations):
-            sid_a, sid_b = random.sample(student_ids, 2)
+        # 一次性批量抽样代替循环内的 random.sample，把 RNG 开销挪出热循环
+        draws = random.choices(student_ids, k=2 * self.swap_iterations)
+        for i in range(self.swap_iterations):
+            sid_a, sid_b = draws[2 * i], draws[2 * i + 1]
+            if sid_a == sid_b:
+                continue
             student_a = self.students[sid_a]
             student_b = self.students[sid_b]
             if not student_a.assigned or not student_b.assigned:
@@ -318,59 +381,65 @@ class Scheduler:
             before_div = self._session_diversity(session_a) + self._session_diversity(session_b)
             after_div = self._session_diversity(session_a, swap_out=student_a, swap_in=student_b)
             after_div += self._session_diversity(session_b, swap_out=student_b, swap_in=student_a)
-            if after_div < before_div:
+            temperature = self.swap_temperature * (1 - i / self.swap_iterations)
+            if after_div - before_div < temperature:
                 self._perform_swap(student_a, session_a, student_b, session_b)
 
     def build_output(self) -> pd.DataFrame:
-        rows = []
-        # 预先计算每个实验组的最终人数
-        group_size = {s.session_id: len(s.assigned_students) for s in self.sessions}
-        seq = 1
+        # 列式构造：每列一个预分配的 list，避免 pandas 逐行解析 dict；
+        # 每组只格式化一次周次标签
+        columns = {
+            name: []
+            for name in (
+                "序号",
+                "院系名称",
+                "专业名称",
+                "班级名称",
+                "学号",
+                "姓名（可能有重名）",
+                "实验项目名称",
+                "上课周次",
+                "上课星期",
+                "开始节次",
+                "结束节次",
+                "上课教师",
+                "实验人数",
+                "课时",
+            )
+        }
+        total = sum(len(s.assigned_students) for s in self.sessions)
+        for col in columns.values():
+            col.extend([None] * total)
+        i = 0
         for session in self.sessions:
+            group_size = len(session.assigned_students)
+            if not group_size:
+                continue
+            weeks_label = "，".join(sorted(str(w) + "周" for w in weeks_from_mask(session.weeks_mask)))
+            weekday_label = WEEKDAY_LABEL.get(session.weekday, str(session.weekday))
             for sid in session.assigned_students:
                 student = self.students[sid]
-                weekday_label = WEEKDAY_LABEL.get(session.weekday, str(session.weekday))
-                rows.append(
-                    {
-                        "序号": seq,
-                        "院系名称": student.dept,
-                        "专业名称": student.major,
-                        "班级名称": student.clazz,
-                        "学号": student.student_id,
-                        "姓名（可能有重名）": student.name,
-                        "实验项目名称": session.project_name,
-                        "上课周次": "，".join(sorted(str(w) + "周" for w in sorted(session.weeks))),
-                        "上课星期": weekday_label,
-                        "开始节次": session.start_period,
-                        "结束节次": session.end_period,
-                        "上课教师": session.teacher,
-                        "实验人数": group_size[session.session_id],
-                        "课时": session.hours,
-                    }
-                )
-                seq += 1
-        df = pd.DataFrame(rows, columns=[
-            "序号",
-            "院系名称",
-            "专业名称",
-            "班级名称",
-            "学号",
-            "姓名（可能有重名）",
-            "实验项目名称",
-            "上课周次",
-            "上课星期",
-            "开始节次",
-            "结束节次",
-            "上课教师",
-            "实验人数",
-            "课时",
-        ])
-        return df
+                columns["序号"][i] = i + 1
+                columns["院系名称"][i] = student.dept
+                columns["专业名称"][i] = student.major
+                columns["班级名称"][i] = student.clazz
+                columns["学号"][i] = student.student_id
+                columns["姓名（可能有重名）"][i] = student.name
+                columns["实验项目名称"][i] = session.project_name
+                columns["上课周次"][i] = weeks_label
+                columns["上课星期"][i] = weekday_label
+                columns["开始节次"][i] = session.start_period
+                columns["结束节次"][i] = session.end_period
+                columns["上课教师"][i] = session.teacher
+                columns["实验人数"][i] = group_size
+                columns["课时"][i] = session.hours
+                i += 1
+        return pd.DataFrame(columns)
 
     def report_unfilled(self) -> List[str]:
         msgs = []
         for sid, stu in self.students.items():
-            need = self.required_hours - self._student_hours(stu)
+            need = self.required_hours - stu.hours_total
             if need > 0:
                 msgs.append(f"学生 {sid} 还缺少 {need} 学时，可考虑手动调整或增加实验场次")
         return msgs
@@ -2,9 +2,14 @@ from __future__ import annotations
 
 import math
 import re
-from typing import Iterable, Optional, Set, Tuple
+from functools import lru_cache
+from typing import Optional, Tuple
 
-from .models import TimeSlot
+from .models import ts_pack
+
+# 每行输入都要过这两个模式，提前编译避免 re 缓存查找
+_WEEK_SPLIT = re.compile(r"[,，]")
+_NUM = re.compile(r"\d+")
 
 WEEKDAY_MAP = {
     "星期一": 1,
@@ -26,36 +31,42 @@ WEEKDAY_MAP = {
 }
 
 
-def parse_weeks(raw: Optional[str]) -> Set[int]:
-    """解析诸如“1-6周,8周”格式为周次集合。"""
+# 课表里“1-16”“周三”这类字符串高度重复，解析结果按原串缓存，
+# 重复值直接命中，省掉整个正则与分支流程
+@lru_cache(maxsize=4096)
+def parse_weeks(raw: Optional[str]) -> int:
+    """解析诸如“1-6周,8周”格式为周次位掩码（第 w 周对应第 w 位）。"""
     if raw is None:
-        return set()
+        return 0
     text = str(raw).strip().replace("周", "")
     if not text:
-        return set()
-    parts = re.split(r"[,，]", text)
-    weeks: Set[int] = set()
-    for part in parts:
+        return 0
+    mask = 0
+    for part in _WEEK_SPLIT.split(text):
         part = part.strip()
         if not part:
             continue
         if "-" in part:
-            try:
-                start, end = part.split("-", 1)
-                start_i, end_i = int(start), int(end)
-                if start_i > end_i:
-                    start_i, end_i = end_i, start_i
-                weeks.update(range(start_i, end_i + 1))
-            except ValueError:
-                continue
-        else:
-            try:
-                weeks.add(int(part))
-            except ValueError:
+            start, end = part.split("-", 1)
+            start, end = start.strip(), end.strip()
+            if not (start.isdigit() and end.isdigit()):
                 continue
-    return weeks
+            start_i, end_i = int(start), int(end)
+            if start_i > end_i:
+                start_i, end_i = end_i, start_i
+            # [start_i, end_i] 区间的位一次性置 1
+            mask |= (1 << (end_i + 1)) - (1 << start_i)
+        elif part.isdigit():
+            mask |= 1 << int(part)
+    return mask
+
+
+def weeks_from_mask(mask: int) -> list:
+    """把周次位掩码还原为升序周次列表，仅用于展示。"""
+    return [w for w in range(mask.bit_length()) if mask >> w & 1]
 
 
+@lru_cache(maxsize=4096)
 def parse_weekday(raw: Optional[str]) -> Optional[int]:
     if raw is None:
         return None
@@ -70,12 +81,13 @@ def parse_weekday(raw: Optional[str]) -> Optional[int]:
     return WEEKDAY_MAP.get(text)
 
 
+@lru_cache(maxsize=4096)
 def parse_period_range(raw: Optional[str]) -> Tuple[Optional[int], Optional[int]]:
     """解析节次字段，支持“第3节”“3-5节”“3-5”"""
     if raw is None:
         return None, None
     text = str(raw).strip()
-    nums = re.findall(r"\d+", text)
+    nums = _NUM.findall(text)
     if not nums:
         return None, None
     if len(nums) == 1:
@@ -87,14 +99,13 @@ def parse_period_range(raw: Optional[str]) -> Tuple[Optional[int], Optional[int]
     return start, end
 
 
-def make_timeslot(weeks: Iterable[int], weekday: int, start: int, end: int) -> Optional[TimeSlot]:
-    # 任何字段为空都无法形成有效时间片
+def make_timeslot(weeks_mask: int, weekday: int, start: int, end: int) -> Optional[int]:
+    # 任何字段为空都无法形成有效时间片；返回打包后的时间片 int
     if weekday is None or start is None or end is None:
         return None
-    week_set = set(weeks)
-    if not week_set:
+    if not weeks_mask:
         return None
-    return TimeSlot(week_set, weekday, start, end)
+    return ts_pack(weeks_mask, weekday, start, end)
 
 
 def period_overlap(a: Tuple[int, int], b: Tuple[int, int]) -> bool:
@@ -3,12 +3,19 @@ from __future__ import annotations
 import argparse
 import gzip
 import json
+import sys
+from operator import itemgetter
 from pathlib import Path
 from typing import Dict, List
 
 import pandas as pd
 
-from .utils import parse_period_range, parse_weekday, parse_weeks
+try:  # C 实现的 JSON 序列化，比 json.dumps 快数倍；缺失时退回标准库
+    import orjson
+except ImportError:  # pragma: no cover
+    orjson = None
+
+from .utils import parse_period_range, parse_weekday, parse_weeks, weeks_from_mask
 
 WEEKDAY_MAP = {
     "星期一": 1,
@@ -28,145 +35,274 @@ WEEKDAY_MAP = {
     "周日": 7,
     "周天": 7,
 }
-NUM_TO_WEEKDAY = {1: "星期一", 2: "星期二", 3: "星期三", 4: "星期四", 5: "星期五", 6: "星期六", 7: "星期日"}
+# 星期标签全篇重复上千次，常驻 intern 池让各行共享同一对象
+NUM_TO_WEEKDAY = {
+    k: sys.intern(v)
+    for k, v in {1: "星期一", 2: "星期二", 3: "星期三", 4: "星期四", 5: "星期五", 6: "星期六", 7: "星期日"}.items()
+}
 TIME_LABEL = {3: "上午", 8: "下午", 11: "晚上"}
-COLOR_MAP = {"lab": "linear-gradient(135deg, #60a5fa, #2563eb)", "lecture": "linear-gradient(135deg, #fb923c, #f97316)"}
+# 进入行循环前统一做向量化清洗的字符串列
+_STR_COLS = ["学号", "姓名（可能有重名）", "院系名称", "专业名称", "班级名称", "实验项目名称", "上课教师", "上课星期"]
 
 
-def _to_int(value, default: int = 0) -> int:
-    try:
-        return int(str(value).strip())
-    except Exception:
-        return default
+def _int_column(df: pd.DataFrame, name: str):
+    # 整列一次性数值化；非数值与缺失都归 0，对应 _to_int 的语义
+    if name not in df.columns:
+        return None
+    return pd.to_numeric(df[name], errors="coerce").fillna(0).astype("int64").to_numpy()
+
+
+def _normalize_str_cols(df: pd.DataFrame, names: List[str]) -> pd.DataFrame:
+    # fillna+astype(str)+str.strip 都是 C 级列操作，替代每行 6-7 次 str(...).strip()
+    df = df.copy()
+    for name in names:
+        if name in df.columns:
+            df[name] = df[name].fillna("").astype(str).str.strip()
+    return df
 
 
 def _time_of_day(start_period: int) -> str:
     return TIME_LABEL.get(start_period, "其他")
 
 
+def _lecture_weekday(raw) -> int:
+    # 理论课表的星期既可能是中文也可能是数字
+    num = parse_weekday(raw) or 0
+    if num == 0:
+        try:
+            num = int(raw)
+        except Exception:
+            num = 0
+    return num
+
+
+def _read_excel(path: str) -> pd.DataFrame:
+    # 同一份 xlsx 每次运行都重新解析代价很高：首次读出后写 parquet 旁挂
+    # 缓存，之后只要缓存不旧于源文件就直接走列式快路径；
+    # 没装 parquet 引擎（pyarrow/fastparquet）时静默跳过缓存
+    src_path = Path(path)
+    cache = src_path.with_suffix(".parquet")
+    try:
+        if cache.exists() and cache.stat().st_mtime >= src_path.stat().st_mtime:
+            return pd.read_parquet(cache)
+    except (ImportError, OSError, ValueError):
+        pass
+    # Rust 后端的 calamine 读大表比 openpyxl 快一个量级；未安装时退回默认引擎
+    try:
+        df = pd.read_excel(path, engine="calamine")
+    except ImportError:
+        df = pd.read_excel(path)
+    try:
+        df.to_parquet(cache)
+    except (ImportError, OSError, ValueError):
+        pass
+    return df
+
+
+def _read_csv(path: str) -> pd.DataFrame:
+    # pyarrow 引擎多线程解析大 CSV；未安装时退回默认 C 引擎
+    try:
+        return pd.read_csv(path, engine="pyarrow")
+    except ImportError:
+        return pd.read_csv(path)
+
+
 def load_schedule(path: str) -> pd.DataFrame:
     ext = Path(path).suffix.lower()
     if ext in {".xlsx", ".xls"}:
-        return pd.read_excel(path)
-    return pd.read_csv(path)
+        return _read_excel(path)
+    return _read_csv(path)
 
 
 def load_lecture_schedule(path: str) -> pd.DataFrame:
     ext = Path(path).suffix.lower()
     if ext in {".xlsx", ".xls"}:
-        return pd.read_excel(path)
-    return pd.read_csv(path)
+        return _read_excel(path)
+    return _read_csv(path)
 
 
 def build_data(df: pd.DataFrame, lecture_df: pd.DataFrame | None = None) -> Dict[str, List[dict]]:
   entries: List[dict] = []
   session_map: Dict[str, dict] = {}
-  for _, row in df.iterrows():
-    weeks = sorted(parse_weeks(row.get("上课周次")))
-    weeks_label = "，".join(f"{w}周" for w in weeks)
-    weekday_raw = str(row.get("上课星期", "")).strip()
-    weekday_num = WEEKDAY_MAP.get(weekday_raw, 0)
-    weekday_label = weekday_raw or NUM_TO_WEEKDAY.get(weekday_num, "")
-    start_period = _to_int(row.get("开始节次"))
-    end_period = _to_int(row.get("结束节次"))
-    time_of_day = _time_of_day(start_period)
-    project = str(row.get("实验项目名称", "")).strip()
-    teacher = str(row.get("上课教师", "")).strip()
-    group_key = f"{project}|{teacher}|{weekday_num}|{start_period}|{end_period}|{weeks_label}"
-
+  df = _normalize_str_cols(df, _STR_COLS)
+  # itertuples(name=None) 返回普通 tuple，省去 iterrows 逐行构造 Series 的开销
+  idx = {name: i for i, name in enumerate(df.columns)}
+
+  def cell(row: tuple, name: str, default=None):
+    i = idx.get(name)
+    return row[i] if i is not None else default
+
+  def col(name: str) -> pd.Series:
+    s = df.get(name)
+    return s if s is not None else pd.Series("", index=df.index)
+
+  start_arr = _int_column(df, "开始节次")
+  end_arr = _int_column(df, "结束节次")
+  # 星期列的字典映射整列做一次（C 级哈希探测），循环内只剩下标读取
+  weekday_arr = (
+    df["上课星期"].map(WEEKDAY_MAP).fillna(0).astype("int64").to_numpy()
+    if "上课星期" in df.columns
+    else None
+  )
+  # 周次字符串高度重复：去重后各解析/拼 label 一次，循环内改查表
+  weeks_raw = col("上课周次").astype(str)
+  weeks_map = {v: weeks_from_mask(parse_weeks(v)) for v in weeks_raw.unique()}
+  label_map = {v: "，".join(f"{w}周" for w in ws) for v, ws in weeks_map.items()}
+  # 前端用的周次掩码：第 w 周对应第 w-1 位，周次 ≤16 可安全落在 int32
+  wmask_map = {v: sum(1 << (w - 1) for w in ws) for v, ws in weeks_map.items()}
+  weeks_vals = weeks_raw.to_numpy()
+
+  for i, row in enumerate(df.itertuples(index=False, name=None)):
+    weekday_raw = cell(row, "上课星期", "")
+    weekday_num = int(weekday_arr[i]) if weekday_arr is not None else 0
+    weekday_label = sys.intern(weekday_raw or NUM_TO_WEEKDAY.get(weekday_num, ""))
+    start_period = int(start_arr[i]) if start_arr is not None else 0
+    end_period = int(end_arr[i]) if end_arr is not None else 0
+
+    # color/weeksLabel/timeOfDay/groupKey 均可由其余字段推出，前端自行重建
     entry = {
-      "studentId": str(row.get("学号", "")).strip(),
-      "name": str(row.get("姓名（可能有重名）", "")).strip(),
-      "dept": str(row.get("院系名称", "")).strip(),
-      "major": str(row.get("专业名称", "")).strip(),
-      "clazz": str(row.get("班级名称", "")).strip(),
-      "project": project,
+      "studentId": cell(row, "学号", ""),
+      "name": cell(row, "姓名（可能有重名）", ""),
+      "dept": cell(row, "院系名称", ""),
+      "major": cell(row, "专业名称", ""),
+      "clazz": cell(row, "班级名称", ""),
+      "project": cell(row, "实验项目名称", ""),
       "kind": "lab",
-      "color": COLOR_MAP["lab"],
-      "weeks": weeks,
-      "weeksLabel": weeks_label,
+      "weeks": weeks_map[weeks_vals[i]],
+      "weeksMask": wmask_map[weeks_vals[i]],
       "weekday": weekday_num,
       "weekdayLabel": weekday_label,
-      "timeOfDay": time_of_day,
       "startPeriod": start_period,
       "endPeriod": end_period,
-      "teacher": teacher,
-      "groupKey": group_key,
+      "teacher": cell(row, "上课教师", ""),
     }
     entries.append(entry)
 
-    if group_key not in session_map:
+  # 课次表改为一次 groupby 生成：分组在 C 层完成，省去行循环里的
+  # 字典探测与逐行 append；组内行序与原始行序一致
+  if len(df):
+    gdf = pd.DataFrame(
+      {
+        "project": col("实验项目名称"),
+        "teacher": col("上课教师"),
+        "weekdayRaw": col("上课星期"),
+        "weekday": weekday_arr if weekday_arr is not None else 0,
+        "startPeriod": start_arr if start_arr is not None else 0,
+        "endPeriod": end_arr if end_arr is not None else 0,
+        "weeksRaw": weeks_raw,
+        "weeksLabel": weeks_raw.map(label_map),
+        "studentId": col("学号"),
+        "name": col("姓名（可能有重名）"),
+        "dept": col("院系名称"),
+        "major": col("专业名称"),
+        "clazz": col("班级名称"),
+      }
+    )
+    # groupKey 整列一次向量化拼接（C 层循环），分组键从 6 列元组
+    # 变成单列字符串，也正是最终对外暴露的 groupKey
+    gdf["groupKey"] = (
+      gdf["project"] + "|" + gdf["teacher"] + "|"
+      + gdf["weekday"].astype(str) + "|" + gdf["startPeriod"].astype(str) + "|"
+      + gdf["endPeriod"].astype(str) + "|" + gdf["weeksLabel"]
+    )
+    for group_key, sub in gdf.groupby("groupKey", sort=False):
+      first = sub.iloc[0]
+      weekday_num = int(first["weekday"])
+      start_period = int(first["startPeriod"])
+      end_period = int(first["endPeriod"])
+      weeks_label = first["weeksLabel"]
+      weeks = weeks_map[first["weeksRaw"]]
       session_map[group_key] = {
         "groupKey": group_key,
-        "project": project,
-        "teacher": teacher,
+        "project": first["project"],
+        "teacher": first["teacher"],
         "weeks": weeks,
+        # weeks 已升序，首元素即最早周次；给排序用，免得每次 min() 扫一遍
+        "firstWeek": weeks[0] if weeks else 99,
         "weeksLabel": weeks_label,
         "weekday": weekday_num,
-        "weekdayLabel": weekday_label,
-        "timeOfDay": time_of_day,
+        "weekdayLabel": sys.intern(first["weekdayRaw"] or NUM_TO_WEEKDAY.get(weekday_num, "")),
+        "timeOfDay": _time_of_day(start_period),
         "startPeriod": start_period,
         "endPeriod": end_period,
-        "students": [],
+        # 名单一次性由列切片转 records，不再逐行拼 dict
+        "students": sub[["studentId", "name", "dept", "major", "clazz"]].to_dict("records"),
       }
-    session_map[group_key]["students"].append(
-      {
-        "studentId": entry["studentId"],
-        "name": entry["name"],
-        "dept": entry["dept"],
-        "major": entry["major"],
-        "clazz": entry["clazz"],
-      }
-    )
 
+  # itemgetter 在 C 层取键，省去每个课次一次 lambda 调用和 min() 扫描
   session_list = sorted(
     session_map.values(),
-    key=lambda x: (min(x["weeks"] or [99]), x["weekday"], x["startPeriod"], x["project"]),
+    key=itemgetter("firstWeek", "weekday", "startPeriod", "project"),
   )
 
   if lecture_df is not None:
-    for _, row in lecture_df.iterrows():
-      weeks = sorted(parse_weeks(row.get("周次")))
-      weeks_label = "，".join(f"{w}周" for w in weeks)
-      raw_weekday = str(row.get("上课星期", "")).strip()
-      weekday_num = parse_weekday(raw_weekday) or 0
-      if weekday_num == 0:
-        try:
-          weekday_num = int(raw_weekday)
-        except Exception:
-          weekday_num = 0
-      weekday_label = NUM_TO_WEEKDAY.get(weekday_num, raw_weekday)
-      start_p, end_p = parse_period_range(row.get("上课节次"))
+    lecture_df = _normalize_str_cols(lecture_df, _STR_COLS)
+    lidx = {name: i for i, name in enumerate(lecture_df.columns)}
+
+    def lcell(row: tuple, name: str, default=None):
+      i = lidx.get(name)
+      return row[i] if i is not None else default
+
+    # 理论课星期解析含数字回退，对去重后的取值各算一次再整列映射
+    if "上课星期" in lecture_df.columns:
+      lect_col = lecture_df["上课星期"]
+      lect_wd_map = {v: _lecture_weekday(v) for v in lect_col.unique()}
+      lect_weekday_arr = lect_col.map(lect_wd_map).astype("int64").to_numpy()
+    else:
+      lect_weekday_arr = None
+
+    # 周次同样按去重取值建表
+    if "周次" in lecture_df.columns:
+      lect_weeks_raw = lecture_df["周次"].astype(str)
+    else:
+      lect_weeks_raw = pd.Series("", index=lecture_df.index)
+    lect_weeks_map = {v: weeks_from_mask(parse_weeks(v)) for v in lect_weeks_raw.unique()}
+    lect_wmask_map = {v: sum(1 << (w - 1) for w in ws) for v, ws in lect_weeks_map.items()}
+    lect_weeks_vals = lect_weeks_raw.to_numpy()
+
+    for i, row in enumerate(lecture_df.itertuples(index=False, name=None)):
+      raw_weekday = lcell(row, "上课星期", "")
+      weekday_num = int(lect_weekday_arr[i]) if lect_weekday_arr is not None else 0
+      weekday_label = sys.intern(NUM_TO_WEEKDAY.get(weekday_num, raw_weekday))
+      start_p, end_p = parse_period_range(lcell(row, "上课节次"))
       start_p = start_p or 0
       end_p = end_p or 0
-      time_of_day = _time_of_day(start_p)
-      project = str(row.get("课程名", "理论课"))
       entry = {
-        "studentId": str(row.get("学号", "")).strip(),
-        "name": str(row.get("姓名（可能有重名）", "")).strip(),
-        "dept": str(row.get("院系名称", "")).strip(),
-        "major": str(row.get("专业名称", "")).strip(),
-        "clazz": str(row.get("班级名称", "")).strip(),
-        "project": project,
+        "studentId": lcell(row, "学号", ""),
+        "name": lcell(row, "姓名（可能有重名）", ""),
+        "dept": lcell(row, "院系名称", ""),
+        "major": lcell(row, "专业名称", ""),
+        "clazz": lcell(row, "班级名称", ""),
+        "project": str(lcell(row, "课程名", "理论课")),
         "kind": "lecture",
-        "color": COLOR_MAP["lecture"],
-        "weeks": weeks,
-        "weeksLabel": weeks_label,
+        "weeks": lect_weeks_map[lect_weeks_vals[i]],
+        "weeksMask": lect_wmask_map[lect_weeks_vals[i]],
         "weekday": weekday_num,
         "weekdayLabel": weekday_label,
-        "timeOfDay": time_of_day,
         "startPeriod": start_p,
         "endPeriod": end_p,
-        "teacher": str(row.get("课程号", "理论课")),
-        "groupKey": f"lecture|{project}|{weekday_num}|{start_p}|{end_p}|{weeks_label}",
+        "teacher": str(lcell(row, "课程号", "理论课")),
       }
       entries.append(entry)
 
-  return {"entries": entries, "sessions": session_list}
+  # 院系/专业/班级在条目间重复度极高，改存字符串表下标，
+  # 前端加载后按 strings 反查还原；JSON 体积与解析量都明显下降
+  table: Dict[str, int] = {}
+  strings: List[str] = []
+  for entry in entries:
+    for field in ("dept", "major", "clazz"):
+      val = entry[field]
+      pos = table.get(val)
+      if pos is None:
+        pos = table[val] = len(strings)
+        strings.append(val)
+      entry[field] = pos
 
+  return {"strings": strings, "entries": entries, "sessions": session_list}
 
-def render_html(output: Path, data_url: str, use_gzip: bool) -> None:
-    template = """<!DOCTYPE html>
+
+# 模板只在模块加载时构造一次，render_html 仅做占位符替换
+_HTML_TEMPLATE = """<!DOCTYPE html>
 <html lang=\"zh\">
 <head>
 <meta charset=\"utf-8\" />
@@ -238,24 +374,28 @@ button:hover { background: #0c78a8; }
   </div>
   <div id=\"week-container\" style=\"margin-top:12px; overflow-x:auto;\"></div>
 </section>
-<script src="https://cdn.jsdelivr.net/npm/pako@2.1.0/dist/pako.min.js"></script>
 <script>
 let data = null;
 const DATA_URL = '__DATA_URL__';
 const times = [\"上午\", \"下午\", \"晚上\"];
 const weekdayLabels = [\"星期一\", \"星期二\", \"星期三\", \"星期四\", \"星期五\", \"星期六\", \"星期日\"];
 const periods = Array.from({ length: 13 }, (_, i) => i + 1);
+// 条目里不再携带可推导字段，配色与时段由 kind/startPeriod 现场重建
+const COLOR = { lab: 'linear-gradient(135deg, #60a5fa, #2563eb)', lecture: 'linear-gradient(135deg, #fb923c, #f97316)' };
+const TIME_OF_DAY = { 3: '上午', 8: '下午', 11: '晚上' };
+function timeOfDay(p) { return TIME_OF_DAY[p] || '其他'; }
 let currentEntries = [];
+let currentGrid = null;
+let labCount = 0;
 let currentWeek = 1;
 const USE_GZIP = __USE_GZIP__;
 function loadData() {
   return fetch(DATA_URL).then(resp => {
     if (!resp.ok) throw new Error('数据文件加载失败');
     if (USE_GZIP) {
-      return resp.arrayBuffer().then(buf => {
-        const inflated = pako.inflate(new Uint8Array(buf), { to: 'string' });
-        return JSON.parse(inflated);
-      });
+      // 浏览器原生解压，边下载边流式膨胀，不再依赖 pako CDN
+      const stream = resp.body.pipeThrough(new DecompressionStream('gzip'));
+      return new Response(stream).json();
     }
     return resp.json();
   });
@@ -273,25 +413,49 @@ function initSessions() {
   });
 }
 
+function buildLabGrid() {
+  // 每次搜索后建一次 (时段, 周次) 索引，渲染 3x16 个格子时 O(1) 取用
+  currentGrid = { '上午': {}, '下午': {}, '晚上': {} };
+  labCount = 0;
+  currentEntries.forEach(e => {
+    if (e.kind !== 'lab') return;
+    labCount++;
+    const bucket = currentGrid[timeOfDay(e.startPeriod)];
+    if (!bucket) return;
+    e.weeks.forEach(w => { (bucket[w] || (bucket[w] = [])).push(e); });
+  });
+}
+
 function handleStudentSearch() {
   const kw = document.getElementById('student-input').value.trim();
   if (!kw) {
     currentEntries = [];
-    currentWeek = 1;
-    renderLabCalendar();
-    renderWeekView();
-    return;
+  } else {
+    currentEntries = data.entries.filter(e => e.studentId.includes(kw) || e.name.includes(kw));
   }
-  currentEntries = data.entries.filter(e => e.studentId.includes(kw) || e.name.includes(kw));
+  buildLabGrid();
   currentWeek = 1;
   renderLabCalendar();
   renderWeekView();
 }
 
+function makePill(item, subLabel) {
+  // textContent 赋值不走 HTML 解析器，也顺带规避了姓名/课名中的特殊字符
+  const pill = document.createElement('div');
+  pill.className = 'pill';
+  pill.style.background = COLOR[item.kind] || 'linear-gradient(135deg, #6b7280, #4b5563)';
+  const strong = document.createElement('strong');
+  strong.textContent = item.project;
+  const small = document.createElement('small');
+  small.textContent = subLabel;
+  pill.appendChild(strong);
+  pill.appendChild(small);
+  return pill;
+}
+
 function renderLabCalendar() {
   const container = document.getElementById('calendar-container');
-  const entries = currentEntries.filter(e => e.kind === 'lab');
-  if (!entries.length) {
+  if (!labCount) {
     container.innerHTML = '<div style="color:#6b7280;">输入学号或姓名后显示排号的物理实验课。</div>';
     return;
   }
@@ -314,20 +478,15 @@ function renderLabCalendar() {
     for (let w=1; w<=16; w++) {
       const cell = document.createElement('div');
       cell.className = 'grid-cell';
-      const items = entries.filter(e => e.timeOfDay === t && e.weeks.includes(w));
+      const items = (currentGrid && currentGrid[t] && currentGrid[t][w]) || [];
       items.forEach(item => {
-        const pill = document.createElement('div');
-        pill.className = 'pill';
-        pill.style.background = item.color || 'linear-gradient(135deg, #6b7280, #4b5563)';
         const teacherLabel = item.teacher ? ` · ${item.teacher}` : '';
-        pill.innerHTML = `<strong>${item.project}</strong><small>实验课 · ${item.weekdayLabel || '星期'+item.weekday} · ${item.timeOfDay}${teacherLabel}</small>`;
-        cell.appendChild(pill);
+        cell.appendChild(makePill(item, `实验课 · ${item.weekdayLabel || '星期'+item.weekday} · ${timeOfDay(item.startPeriod)}${teacherLabel}`));
       });
       grid.appendChild(cell);
     }
   });
-  container.innerHTML = '';
-  container.appendChild(grid);
+  container.replaceChildren(grid);
 }
 
 function renderWeekView() {
@@ -366,7 +525,7 @@ function renderWeekView() {
     body.className = 'day-body';
 
     const dayEntries = currentEntries
-      .filter(e => e.weeks.includes(currentWeek) && e.weekday === idx + 1)
+      .filter(e => ((e.weeksMask >>> (currentWeek - 1)) & 1) && e.weekday === idx + 1)
       .sort((a, b) => (a.startPeriod || 0) - (b.startPeriod || 0));
 
     if (!dayEntries.length) {
@@ -378,14 +537,11 @@ function renderWeekView() {
       dayEntries.forEach(item => {
         if (!item.startPeriod || item.startPeriod < 1 || item.startPeriod > 13) return;
         const span = Math.max(1, (item.endPeriod || item.startPeriod) - item.startPeriod + 1);
-        const pill = document.createElement('div');
-        pill.className = 'pill';
-        pill.style.background = item.color || 'linear-gradient(135deg, #6b7280, #4b5563)';
-        pill.style.gridRow = `${item.startPeriod} / ${item.startPeriod + span}`;
         const teacherLabel = item.teacher ? ` · ${item.teacher}` : '';
         const kindLabel = item.kind === 'lecture' ? '理论课' : '实验课';
         const periodLabel = `${item.startPeriod}-${item.endPeriod || item.startPeriod}节`;
-        pill.innerHTML = `<strong>${item.project}</strong><small>${kindLabel} · ${periodLabel}${teacherLabel}</small>`;
+        const pill = makePill(item, `${kindLabel} · ${periodLabel}${teacherLabel}`);
+        pill.style.gridRow = `${item.startPeriod} / ${item.startPeriod + span}`;
         body.appendChild(pill);
       });
     }
@@ -394,8 +550,7 @@ function renderWeekView() {
     grid.appendChild(dayCol);
   });
 
-  container.innerHTML = '';
-  container.appendChild(grid);
+  container.replaceChildren(grid);
 }
 
 function prevWeek() {
@@ -439,22 +594,38 @@ function handleSessionView() {
 }
 
 loadData()
-  .then(d => { data = d; initSessions(); renderLabCalendar(); renderWeekView(); })
+  .then(d => {
+    // 还原字符串表下标为原文
+    const strings = d.strings || [];
+    d.entries.forEach(e => {
+      e.dept = strings[e.dept];
+      e.major = strings[e.major];
+      e.clazz = strings[e.clazz];
+    });
+    data = d; initSessions(); renderLabCalendar(); renderWeekView();
+  })
   .catch(err => { console.error(err); document.body.innerHTML = '<div style="padding:16px;color:#ef4444;">数据加载失败</div>'; });
 </script>
 </body>
 </html>"""
-    html = template.replace("__DATA_URL__", data_url)
+
+
+def render_html(output: Path, data_url: str, use_gzip: bool) -> None:
+    html = _HTML_TEMPLATE.replace("__DATA_URL__", data_url)
     html = html.replace("__USE_GZIP__", "true" if use_gzip else "false")
     output.write_text(html, encoding="utf-8")
 
 
 def write_data_file(data: Dict[str, List[dict]], path: Path, compress: bool) -> None:
+    if orjson is not None:
+        blob = orjson.dumps(data)
+    else:
+        blob = json.dumps(data, ensure_ascii=False).encode("utf-8")
     if compress:
-        with gzip.open(path, "wt", encoding="utf-8") as f:
-            json.dump(data, f, ensure_ascii=False)
+        with gzip.open(path, "wb") as f:
+            f.write(blob)
     else:
-        path.write_text(json.dumps(data, ensure_ascii=False), encoding="utf-8")
+        path.write_bytes(blob)
 
 
 def parse_args() -> argparse.Namespace: